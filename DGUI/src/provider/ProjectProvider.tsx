@@ -2,6 +2,40 @@ import React, { createContext, useContext, useState, useEffect, useRef, ReactNod
 import { Project } from '../models/Project'; // Assuming DocumentType is also in Project or a similar path
 import { DocumentType } from './WorkspaceProvider';
 
+type ProjectFileRecord = NonNullable<Project['files']>['input'][number];
+
+// Incremental update sent by the backend after a single file or history change
+interface ProjectPatch {
+    type: 'project_patch';
+    id: string;
+    op: 'add_file' | 'remove_file' | 'rename_file' | 'add_processing_record';
+    modified_date: string;
+    file_type?: keyof NonNullable<Project['files']>;
+    file?: ProjectFileRecord;
+    name?: string;
+    old_name?: string;
+    record?: any;
+}
+
+const applyProjectPatch = (project: Project, patch: ProjectPatch): Project => {
+    const updated: Project = { ...project, modified_date: patch.modified_date };
+    if (patch.op === 'add_processing_record') {
+        updated.processing_history = [...(project.processing_history || []), patch.record];
+        return updated;
+    }
+    if (!project.files || !patch.file_type) {
+        return updated;
+    }
+    const staleName = patch.op === 'rename_file' ? patch.old_name : patch.op === 'remove_file' ? patch.name : patch.file?.name;
+    let files = project.files[patch.file_type].filter(f => f.name !== staleName && f.name !== patch.file?.name);
+    if (patch.file) {
+        // Backend keeps each list sorted by name
+        files = [...files, patch.file].sort((a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
+    }
+    updated.files = { ...project.files, [patch.file_type]: files };
+    return updated;
+};
+
 interface ProjectContextType {
     projects: Project[];
     currentProject: Project | null;
@@ -96,27 +130,45 @@ export const ProjectProvider: React.FC<ProjectProviderProps> = ({ children }) =>
             webSocketRef.current = ws; ws.onopen = () => {
                 console.log(`[ProjectContext] WebSocket_project connected to project: ${currentProject.id}`);
             };
+            const handleProjectMessage = (message: any) => {
+                if (message && message.type === 'project_patch') {
+                    const patch = message as ProjectPatch;
+                    setCurrentProject(prevProject =>
+                        prevProject && prevProject.id === patch.id ? applyProjectPatch(prevProject, patch) : prevProject
+                    );
+                    setProjects(prevProjects =>
+                        prevProjects.map(p =>
+                            p.id === patch.id ? { ...p, modified_date: patch.modified_date } : p
+                        )
+                    );
+                    return;
+                }
+                const projectUpdateData = message as Project;
+                if (projectUpdateData) {
+                    // Update current project if it matches
+                    setCurrentProject(prevProject => {
+                        if (prevProject && projectUpdateData.id === prevProject.id) {
+                            const newProjectState = { ...prevProject, ...projectUpdateData };
+                            return newProjectState as Project;
+                        }
+                        return prevProject;
+                    });
+
+                    // Always update projects list
+                    setProjects(prevProjects =>
+                        prevProjects.map(p =>
+                            p.id === projectUpdateData.id ? { ...p, ...projectUpdateData } : p
+                        )
+                    );
+                }
+            };
             ws.onmessage = (event) => {
                 try {
                     console.log(`[ProjectContext] WebSocket message received for project: ${currentProject?.id}`, event.data);
-                    const projectUpdateData = JSON.parse(event.data as string) as Project;
-                    if (projectUpdateData) {
-                        // Update current project if it matches
-                        setCurrentProject(prevProject => {
-                            if (prevProject && projectUpdateData.id === prevProject.id) {
-                                const newProjectState = { ...prevProject, ...projectUpdateData };
-                                return newProjectState as Project;
-                            }
-                            return prevProject;
-                        });
-
-                        // Always update projects list
-                        setProjects(prevProjects =>
-                            prevProjects.map(p =>
-                                p.id === projectUpdateData.id ? { ...p, ...projectUpdateData } : p
-                            )
-                        );
-                    }
+                    const message = JSON.parse(event.data as string);
+                    // The backend coalesces bursts of updates into one batch frame
+                    const messages = message && message.type === 'batch' ? message.messages : [message];
+                    messages.forEach(handleProjectMessage);
                 } catch (e) {
                     console.error('[ProjectContext] Error processing WebSocket message:', e);
                 }
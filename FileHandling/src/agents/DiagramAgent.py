@@ -1,5 +1,7 @@
 import litellm
 import json
+import re
+import functools
 from typing import Optional
 from utils.Context import Context
 from utils.Project import Project
@@ -7,7 +9,7 @@ from config import settings
 from agents.schema.ClassDiagramSchema import VALIDATE_SCHEMA_CLASS_DIAGRAM, JSON_CLASS_DIAGRAM_SCHEMA_STRING
 from agents.schema.SequenceDiagramSchema import VALIDATE_SCHEMA_SEQUENCE_DIAGRAM
 from agents.schema.DatabaseDiagramSchema import VALIDATE_SCHEMA_DATABASE_DIAGRAM, JSON_DATABASE_DIAGRAM_SCHEMA_STRING
-from agents.schema.UseCaseDiagramSchema import VALIDATE_SCHEMA_USE_CASE_DIAGRAM, JSON_USE_CASE_DIAGRAM_SCHEMA_STRING
+from agents.schema.UseCaseDiagramSchema import VALIDATE_SCHEMA_USE_CASE_DIAGRAM, JSON_USE_CASE_DIAGRAM_SCHEMA_STRING, USE_CASE_PATTERN
 from agents.MultimodalMixin import MultimodalMixin
 
 
@@ -428,14 +430,16 @@ Return the JSON change object describing exactly what needs to be added or remov
             return "UML Sequence Diagram"
         elif "database" in prompt_lower or "er" in prompt_lower or "entity" in prompt_lower:
             return "Database Diagram"
-        elif "use case" in prompt_lower or "usecase" in prompt_lower:
+        elif USE_CASE_PATTERN.search(prompt):
             return "Use Case Diagram"
         elif "activity" in prompt_lower:
             return "Activity Diagram"
         else:
             return "UML Class Diagram"  # Default
-    def _get_diagram_schema(self, diagram_type: str) -> str:
-        """Get the schema information for the specified diagram type."""
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_diagram_schema(diagram_type: str) -> str:
+        """Get the schema information for the specified diagram type. Built once per type, as the schemas are constants."""
         if diagram_type == "UML Class Diagram":
             return f"""
 Target Diagram Type: UML Class Diagram
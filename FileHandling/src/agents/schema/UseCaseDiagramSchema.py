@@ -1,5 +1,6 @@
 # JSON Schema for Use Case Diagram
 import json
+import re
 
 JSON_USE_CASE_DIAGRAM_SCHEMA = {
     "diagramType": "Use Case Diagram",
@@ -27,6 +28,9 @@ JSON_USE_CASE_DIAGRAM_SCHEMA = {
 
 JSON_USE_CASE_DIAGRAM_SCHEMA_STRING = json.dumps(JSON_USE_CASE_DIAGRAM_SCHEMA, indent=2)
 
+# Prompts asking for a use case diagram, written as "use case" or "usecase" in any casing
+USE_CASE_PATTERN = re.compile(r"use ?case", re.IGNORECASE)
+
 def VALIDATE_SCHEMA_USE_CASE_DIAGRAM(data):
     """
     Validates a dictionary against the Use Case Diagram schema.
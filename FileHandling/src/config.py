@@ -1,4 +1,3 @@
-import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -44,7 +43,6 @@ print(f"Projects Registry File: {settings.PROJECTS_REGISTRY_FILE}")
 if not settings.PROJECTS_REGISTRY_FILE.exists():
     print(f"Projects registry file will be created at: {settings.PROJECTS_REGISTRY_FILE}")
     try:
-        with open(settings.PROJECTS_REGISTRY_FILE, 'w') as f:
-            json.dump([], f) # Initialize with an empty list
+        settings.PROJECTS_REGISTRY_FILE.touch() # Empty JSON Lines file: no projects yet
     except Exception as e:
         print(f"Could not create initial empty projects registry: {e}")
@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import settings
-from dependencies import app_state, register_agent_instance, clear_all_agent_instances
+from dependencies import app_state, excel_handler, register_agent_instance, clear_all_agent_instances
 from routers import projects, files, chat, serve
 
 # Import Agent classes for registration
@@ -42,6 +42,10 @@ async def lifespan(app: FastAPI):
 
     yield
     # Shutdown
+    if app_state.get("current_project"):
+        await app_state["current_project"].flush_metadata() # Write any coalesced metadata save still pending
+    # Quit Excel on its COM thread while the executor can still run work
+    excel_handler.close()
     print("Application shutdown: Clearing agent instances...")
     clear_all_agent_instances()
     # dummy_project.create_directory_structure() # cleanup dummy if created
@@ -1,5 +1,6 @@
 import os
 import shutil
+import asyncio
 from typing import Annotated, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Body, status
 from werkzeug.utils import secure_filename
@@ -183,7 +184,7 @@ async def get_sheets(
         file_name = file_data['name']
 
         try:
-            sheets_or_error = excel_handler.get_sheet_names(file_path)
+            sheets_or_error = await asyncio.to_thread(excel_handler.get_sheet_names, file_path)
             if isinstance(sheets_or_error, list):
                 all_sheet_names_map[file_name] = sheets_or_error
             elif isinstance(sheets_or_error, dict) and "error" in sheets_or_error:
@@ -228,7 +229,9 @@ async def preview_sheet(
         )
     
     # Get preview data from the Excel handler
-    preview_result = excel_handler.get_sheet_preview_data(
+    # Excel calls block until the handler's COM thread is done; keep them off the event loop
+    preview_result = await asyncio.to_thread(
+        excel_handler.get_sheet_preview_data,
         excel_file_path=request_data.filePath,
         sheet_name=request_data.sheetName,
         max_rows=100
@@ -283,7 +286,8 @@ async def process_excel(
             )
 
         try:
-            result = excel_handler.process_sheets(
+            result = await asyncio.to_thread(
+                excel_handler.process_sheets,
                 excel_file_path=file_info.path,
                 output_folder=str(processed_dir_path),
                 sheet_types=file_info.sheets,  # This should be a dict of sheet_name -> "ui" or "table"
@@ -475,14 +479,7 @@ async def preview_source_file(
     """Get preview content for source files (text content for txt/csv, metadata for images)."""
     
     # Validate file exists in project
-    files_in_folder = current_project.files.get(request_data.folder, [])
-    target_file = None
-    
-    for file_entry in files_in_folder:
-        if file_entry['name'] == request_data.file_name:
-            target_file = file_entry
-            break
-    
+    target_file = current_project.get_file(request_data.folder, request_data.file_name)
     if not target_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -502,7 +499,7 @@ async def preview_source_file(
     try:
         # Handle text files
         if file_extension in ['.txt', '.csv']:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
                 content = f.read()
                 # Limit content size for preview (first 1000 characters)
                 if len(content) > 1000:
@@ -549,21 +546,15 @@ async def preview_source_file(
 async def delete_file(
     filetype: str,
     filename: str,
-    current_project: Annotated[Project, Depends(get_current_project)]
+    current_project: Annotated[Project, Depends(get_current_project)],
+    excel_handler: Annotated[ExcelFileHandler, Depends(get_excel_handler)]
 ):
     """Delete a file from the specified folder (input or processed)."""
     if filetype not in ["input", "processed", "output"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Folder must be 'input' or 'processed' or 'output'")
 
     # Find the file in project records
-    files_in_folder = current_project.files.get(filetype, [])
-    target_file = None
-    
-    for file_entry in files_in_folder:
-        if file_entry['name'] == filename:
-            target_file = file_entry
-            break
-    
+    target_file = current_project.get_file(filetype, filename)
     if not target_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -573,6 +564,9 @@ async def delete_file(
     file_path = target_file['path']
     
     try:
+        # Excel keeps recently used workbooks open, which would lock the file
+        await asyncio.to_thread(excel_handler.invalidate, file_path)
+
         # Remove physical file
         if os.path.exists(file_path):
             os.remove(file_path)
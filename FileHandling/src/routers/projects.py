@@ -1,15 +1,16 @@
 import os
+import json
+import asyncio
 import time
 from typing import List, Annotated, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, status, Body, WebSocket, WebSocketDisconnect
 from pathlib import Path
 
-from datetime import datetime
 from utils.Project import Project
 from utils import RegistryHandler
 from utils.WebSocketManager import project_socket_manager
 from models import ProjectCreateRequest, ProjectInfo, ProjectListItem, SimpleStatusResponse, ErrorResponse
-from dependencies import get_app_state, get_optional_current_project, remove_chat_agent_for_project, get_current_project
+from dependencies import excel_handler, get_app_state, get_optional_current_project, remove_chat_agent_for_project, get_current_project
 from agents.ChatAgent import ChatAgent # Import ChatAgent
 from config import settings # For default model names
 
@@ -19,10 +20,25 @@ router = APIRouter(
     responses={404: {"description": "Not found", "model": ErrorResponse}},
 )
 
+# Initial contents for files created via /create-output
+_MD_INIT = "# New Document\n\n"
+_HTML_INIT = "<html><body><h1>New Document</h1></body></html>"
+
 # WebSocket endpoint for general project updates (distinct from chat)
 @router.websocket("/ws/{project_id}")
-async def websocket_project_updates_endpoint(websocket: WebSocket, project_id: str):
-    await project_socket_manager.connect(websocket, project_id)
+async def websocket_project_updates_endpoint(
+    websocket: WebSocket,
+    project_id: str,
+    app_state: Annotated[Dict, Depends(get_app_state)]
+):
+    def full_state() -> Optional[Dict[str, Any]]:
+        # Sent once on connect; later updates arrive as patches against it
+        current_project: Optional[Project] = app_state.get("current_project")
+        if current_project and current_project.id == project_id:
+            return current_project.to_dict()
+        return None
+
+    await project_socket_manager.connect(websocket, project_id, full_state)
     try:
         while True:
             # This connection is primarily for server-to-client project updates.
@@ -104,7 +120,7 @@ async def create_project(
     if not project.create_directory_structure():
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create project directory structure.")
 
-    await project.scan_and_update_files() # Initial scan
+    await project.scan_and_update_files(debounce=True) # Initial scan
     await project.save_metadata()
 
     app_state["current_project"] = project
@@ -116,8 +132,7 @@ async def create_project(
 
     print(f"Project '{project.name}' ({project.id}) created and set as current.")
 
-    projects_registry = RegistryHandler.load_projects_registry()
-    projects_registry.append({
+    RegistryHandler.append_project({
         "id": project.id,
         "name": project.name,
         "base_dir": str(project.base_dir), # Use project.base_dir (absolute)
@@ -125,13 +140,12 @@ async def create_project(
         "created_date": project.created_date.isoformat(),
         "modified_date": project.modified_date.isoformat()
     })
-    RegistryHandler.save_projects_registry(projects_registry)
 
-    project_info_response = ProjectInfo(**project.to_dict())
-    await project_socket_manager.broadcast(project.id, {"type":"project_loaded", "project_data": project_info_response.model_dump()})
+    if project_socket_manager.has_subscribers(project.id): # Skip dumping the payload when nobody is listening
+        await project_socket_manager.broadcast(project.id, {"type":"project_loaded", "project_data": project.get_info_payload()})
 
 
-    return project_info_response
+    return project.get_info()
 
 @router.post("/create-output", response_model=SimpleStatusResponse, summary="Add a new output file")
 async def add_output_file(
@@ -160,19 +174,20 @@ async def add_output_file(
     target_dir_path.mkdir(parents=True, exist_ok=True)
       # The frontend already sends the filename with the correct extension, so we don't need to add it again
     concat_filename = file_name
-    init_content = (
-        "# New Document\n\n" if document_type == "markdown" else
-        "<html><body><h1>New Document</h1></body></html>" if document_type == "html" else
-'''{
-  "diagramType": "''' + (diagram_type or "UML Class Diagram") + '''",
-  "diagramName": "''' + file_name + '''",
-  "classes": [],
-  "relationships": []
-}''' if document_type == "diagram" else
-        ""
-    )
+    if document_type == "markdown":
+        init_content = _MD_INIT
+    elif document_type == "html":
+        init_content = _HTML_INIT
+    else:
+        # json.dumps escapes quotes etc. in the user-supplied names
+        init_content = json.dumps({
+            "diagramType": diagram_type or "UML Class Diagram",
+            "diagramName": file_name,
+            "classes": [],
+            "relationships": []
+        }, indent=2)
     print(f"Creating file: {concat_filename} in {file_type} folder with initial content:\n{init_content}")
-    current_project.create_file(
+    await current_project.create_file(
         file_name=concat_filename,
         file_type=file_type,
         content=init_content
@@ -196,7 +211,7 @@ async def remove_output_file(
 
     if not success:
         # Check if file actually existed in the records
-        if not any(f['name'] == file_name for f in current_project.files.get("output",[])):
+        if current_project.get_file("output", file_name) is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Output file '{file_name}' not found in project records.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to delete output file '{file_name}'.")
 
@@ -236,6 +251,8 @@ async def load_project(
     current_project_in_state: Optional[Project] = app_state.get("current_project")
     if current_project_in_state and current_project_in_state.id != project_id:
          await close_project_internal(app_state) # This will also clear its chat agent
+    elif current_project_in_state:
+        await current_project_in_state.flush_metadata() # Reloading from disk; write any pending save first
 
     # Construct expected metadata path
     base_dir_str = project_info_from_registry["base_dir"]
@@ -274,15 +291,15 @@ async def load_project(
     print(f"Project '{loaded_project.name}' ({loaded_project.id}) loaded and set as current.")
 
     # Perform a fresh scan and save to ensure consistency, then broadcast
-    await loaded_project.scan_and_update_files()
+    await loaded_project.scan_and_update_files(debounce=True)
     await loaded_project.save_metadata()
 
-    project_info_response = ProjectInfo(**loaded_project.to_dict())
     # Broadcast that this project is now loaded/active.
     # Clients connected to this project_id's WebSocket will receive this.
-    await project_socket_manager.broadcast(loaded_project.id, {"type":"project_loaded", "project_data": project_info_response.model_dump()})
+    if project_socket_manager.has_subscribers(loaded_project.id): # Skip dumping the payload when nobody is listening
+        await project_socket_manager.broadcast(loaded_project.id, {"type":"project_loaded", "project_data": loaded_project.get_info_payload()})
 
-    return project_info_response
+    return loaded_project.get_info()
 
 
 @router.post("/close", response_model=SimpleStatusResponse, summary="Close the current project")
@@ -301,9 +318,9 @@ async def close_project_endpoint( # Renamed to avoid conflict with internal help
 async def get_project_details(
     current_project: Project = Depends(get_current_project) # Ensures a project is active
 ):
-    await current_project.scan_and_update_files() # Refresh file list before sending details
+    await current_project.scan_and_update_files(debounce=True) # Refresh file list before sending details
     # The to_dict() method now includes requirements and tech_stack from context
-    return ProjectInfo(**current_project.to_dict())
+    return current_project.get_info()
 
 
 # --- Internal Helper Functions ---
@@ -318,9 +335,11 @@ async def close_project_internal(app_state: dict) -> Optional[str]:
     closed_project_id = project_to_close.id
     print(f"Closing project: {project_to_close.name} ({closed_project_id})")
 
-    project_to_close.modified_date = datetime.now()
-    await project_to_close.scan_and_update_files() # Ensure files are up-to-date before final save
-    await project_to_close.save_metadata()
+    project_to_close.mark_modified()
+    await project_to_close.scan_and_update_files(debounce=True) # Ensure files are up-to-date before final save
+    await project_to_close.flush_metadata()
+    # Release the input workbooks Excel keeps open, so Windows stops locking the files
+    await asyncio.to_thread(excel_handler.invalidate_dir, project_to_close.input_dir)
 
     projects_registry = RegistryHandler.load_projects_registry()
     for p_reg_info in projects_registry:
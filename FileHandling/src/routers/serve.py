@@ -17,13 +17,10 @@ async def serve_html_file(project_id: str, filename: str, current_project = Depe
     Serve an HTML file from a project's output directory.
     """
     try:
-        base_path = current_project.output_dir 
-        file_path = base_path +"/"+ filename
-        file_path = Path(file_path)
-        base_path = Path(base_path)
-        
+        resolved_base = current_project.resolved_output_dir
+        file_path = resolved_base / filename
+
         resolved_path = file_path.resolve()
-        resolved_base = base_path.resolve()
         if not str(resolved_path).startswith(str(resolved_base)):
             raise HTTPException(status_code=403, detail="Access denied")
 
@@ -49,19 +46,22 @@ async def list_project_files(project_id: str, current_project = Depends(get_curr
     """
     try:
         # Get the output path from the current project
-        base_path = Path(current_project.project_dir) / "output"
+        base_path = current_project.resolved_output_dir
         
         if not base_path.exists():
             raise HTTPException(status_code=404, detail=f"Project not found: {project_id}")
         
-        html_files = []
-        for file_path in base_path.glob("*.html"):
-            html_files.append({
-                "filename": file_path.name,
-                "path": str(file_path.relative_to(base_path)),
-                "size": file_path.stat().st_size,
-                "url": f"/serve/html/{project_id}/{file_path.name}"
-            })
+        # Files are direct children of the output dir, so the filename is the relative path
+        with os.scandir(base_path) as entries:
+            html_files = [
+                {
+                    "filename": entry.name,
+                    "path": entry.name,
+                    "size": entry.stat().st_size,
+                    "url": f"/serve/html/{project_id}/{entry.name}"
+                }
+                for entry in entries if entry.name.lower().endswith(".html") and entry.is_file()
+            ]
         
         return {
             "project_id": project_id,
@@ -106,12 +106,11 @@ async def serve_processed_file(filename: str, current_project = Depends(get_curr
     """
     try:
         # Get the processed path from the current project
-        processed_path = Path(current_project.processed_dir)
-        file_path = processed_path / filename
+        resolved_base = current_project.resolved_processed_dir
+        file_path = resolved_base / filename
         
         # Security check - ensure the file is within the allowed directory
         resolved_path = file_path.resolve()
-        resolved_base = processed_path.resolve()
         
         if not str(resolved_path).startswith(str(resolved_base)):
             raise HTTPException(status_code=403, detail="Access denied")
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, TYPE_CHECKING
+from typing import Dict, List, Any, Tuple, TYPE_CHECKING
 import csv
 
 if TYPE_CHECKING:
@@ -18,8 +18,8 @@ class Context:
 
         # raw data from the excel file - populated by update_from_project
         self.csv_description: List[str] = []
-        self.ui_image: List[str] = [] # Potentially UI mockups
-        self.diagram_image: List[str] = [] # Processed diagram images
+        self.ui_image: Tuple[str, ...] = () # Potentially UI mockups
+        self.diagram_image: Tuple[str, ...] = () # Processed diagram images
 
         # initial context from the excel file and user prompt
         self.project_name: str = ""
@@ -43,7 +43,7 @@ class Context:
         self.csv_description = []
         for csv_file_path in self.project.get_csv_dirs():
             try:
-                with open(csv_file_path, 'r', encoding='utf-8') as file:
+                with open(csv_file_path, 'r', encoding='utf-8-sig') as file: # Excel's native CSV export starts with a BOM
                     csv_content = file.read()
                     self.csv_description.append(csv_content)
             except Exception as e:
@@ -52,6 +52,7 @@ class Context:
         # Assuming all processed images might be relevant.
         # Specific differentiation between UI and Diagram images might need more logic
         # or separate categorized storage in Project if critical.
+        # Tuples, so sharing one between both fields can't leak mutations across them.
         all_images = self.project.get_image_dirs()
         self.ui_image = all_images # For now, assign all. Could be refined.
         self.diagram_image = all_images # For now, assign all.
@@ -71,6 +72,7 @@ class Context:
         self.requirements.features = features
         self.requirements.further_requirements = further_reqs
         self.tech_stack = tech_stack
+        self.project.mark_modified()
 
         # After updating, the project metadata should be saved.
         # This can be done by the caller, or we can add a call here:
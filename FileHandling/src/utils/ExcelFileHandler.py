@@ -1,25 +1,74 @@
 import os
 import csv
-import io
 import time
+import functools
+import threading
+import concurrent.futures
 import win32com.client
+from win32com.client import gencache
 import pythoncom
+from collections import OrderedDict
+from contextlib import contextmanager
 from PIL import ImageGrab
-from typing import List, Dict, Union, Optional
+from typing import List, Dict, Union, Optional, Tuple, TextIO
+
+# Excel's xlCalculationManual, as a literal to avoid a constants lookup
+XL_CALCULATION_MANUAL = -4135
+# xlCSVUTF8 file format for Workbook.SaveAs (Excel 2016+)
+XL_CSV_UTF8 = 62
+
+# Buffer size for CSV output files
+CSV_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# How long to wait for a copied range to appear on the clipboard, and how often to check
+CLIPBOARD_TIMEOUT = 2.0
+CLIPBOARD_POLL_INTERVAL = 0.02
+
+def _on_com_thread(method):
+    """Runs the decorated method on the handler's COM thread, where the Excel objects live."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if threading.get_ident() == self._com_thread_id:
+            return method(self, *args, **kwargs)
+        if self._executor is None:
+            raise RuntimeError("ExcelFileHandler has been closed")
+        return self._executor.submit(method, self, *args, **kwargs).result()
+    return wrapper
 
 class ExcelFileHandler:
     """Handles Excel file operations with persistent Excel application process."""
 
+    # Number of workbooks kept open between calls
+    WORKBOOK_CACHE_SIZE = 4
+
     def __init__(self):
         """Initialize with persistent Excel application."""
-        pythoncom.CoInitialize()
         self.excel = None
-        self._initialize_excel()
+        # Absolute path -> (mtime at open, workbook), least recently used first
+        self._wb_cache: "OrderedDict[str, Tuple[float, win32com.client.CDispatch]]" = OrderedDict()
+        # Every COM call runs on one dedicated thread with its own apartment, so the Excel
+        # objects are never touched from other threads (which would marshal each call).
+        self._com_thread_id: Optional[int] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="excel-com", initializer=self._init_com_thread
+        )
+        # Excel itself is started on first use (see _ensure_excel_ready), not here
+
+    def _init_com_thread(self):
+        pythoncom.CoInitialize()
+        self._com_thread_id = threading.get_ident()
 
+    @_on_com_thread
     def _initialize_excel(self):
         """Initialize the Excel application."""
         try:
-            self.excel = win32com.client.Dispatch("Excel.Application")
+            try:
+                # Early binding: makepy-generated wrappers call by known DISPID
+                # instead of resolving every attribute name at runtime.
+                self.excel = gencache.EnsureDispatch("Excel.Application")
+            except Exception as e:
+                print(f"Early-bound Excel dispatch unavailable ({e}), falling back to late binding")
+                self.excel = win32com.client.Dispatch("Excel.Application")
             self.excel.Visible = False
             self.excel.DisplayAlerts = False
         except Exception as e:
@@ -40,6 +89,20 @@ class ExcelFileHandler:
 
     def close(self):
         """Explicitly close Excel application and cleanup COM."""
+        executor = getattr(self, "_executor", None)
+        if executor is None:
+            return
+        try:
+            if self._com_thread_id is not None:  # The COM thread only exists once Excel was used
+                executor.submit(self._shutdown_com_thread).result()
+        except RuntimeError as e:
+            print(f"Error closing Excel: {e}")  # Executor already stopped, e.g. at interpreter exit
+        self._executor = None
+        executor.shutdown(wait=True)
+
+    def _shutdown_com_thread(self):
+        """Quits Excel and releases COM. Runs on the COM thread."""
+        self._wb_cache.clear()
         if self.excel:
             try:
                 # Close all open workbooks first
@@ -62,6 +125,75 @@ class ExcelFileHandler:
             self._initialize_excel()
         return self.excel is not None
 
+    @contextmanager
+    def _batch_mode(self):
+        """Suspends repainting, recalculation and event handlers while a batch of COM calls runs."""
+        excel = self.excel
+        saved = None
+        try:
+            saved = (excel.ScreenUpdating, excel.Calculation, excel.EnableEvents)
+            excel.ScreenUpdating = False
+            excel.Calculation = XL_CALCULATION_MANUAL  # Only settable while a workbook is open
+            excel.EnableEvents = False
+        except Exception as e:
+            print(f"Could not switch Excel to batch mode: {e}")
+        try:
+            yield
+        finally:
+            if saved is not None:
+                try:
+                    excel.ScreenUpdating, excel.Calculation, excel.EnableEvents = saved
+                except Exception as e:
+                    print(f"Error restoring Excel application settings: {e}")
+
+    def _get_workbook(self, excel_file_path: str) -> win32com.client.CDispatch:
+        """
+        Returns an open workbook for the file, reusing the cached one while the file's
+        mtime is unchanged so listing, previewing and processing share a single Open.
+        """
+        path = os.path.abspath(excel_file_path)
+        mtime = os.path.getmtime(path)
+        cached = self._wb_cache.get(path)
+        if cached is not None:
+            cached_mtime, workbook = cached
+            if cached_mtime == mtime:
+                try:
+                    workbook.Name  # Raises if the workbook was closed outside the cache
+                    self._wb_cache.move_to_end(path)
+                    return workbook
+                except Exception:
+                    pass
+            self.invalidate(path)
+
+        workbook = self.excel.Workbooks.Open(path)
+        self._wb_cache[path] = (mtime, workbook)
+        while len(self._wb_cache) > self.WORKBOOK_CACHE_SIZE:
+            _, (_, oldest) = self._wb_cache.popitem(last=False)
+            self._close_workbook(oldest)
+        return workbook
+
+    @_on_com_thread
+    def invalidate(self, excel_file_path: str) -> None:
+        """Closes the cached workbook for a file, e.g. before the file is deleted or replaced."""
+        cached = self._wb_cache.pop(os.path.abspath(excel_file_path), None)
+        if cached is not None:
+            self._close_workbook(cached[1])
+
+    @_on_com_thread
+    def invalidate_dir(self, directory: str) -> None:
+        """Closes every cached workbook under a directory, e.g. a project's input folder when the project is closed."""
+        prefix = os.path.normcase(os.path.join(os.path.abspath(directory), ""))
+        for path in [p for p in self._wb_cache if os.path.normcase(p).startswith(prefix)]:
+            self.invalidate(path)
+
+    @staticmethod
+    def _close_workbook(workbook: win32com.client.CDispatch) -> None:
+        try:
+            workbook.Close(SaveChanges=False)
+        except Exception:
+            pass  # Already closed
+
+    @_on_com_thread
     def get_sheet_names(self, excel_file_path: str) -> Union[List[str], Dict[str, str]]:
         """Gets all sheet names from an Excel file."""
         print(f"Checking excel_file_path: {excel_file_path}")
@@ -71,42 +203,92 @@ class ExcelFileHandler:
         if not self._ensure_excel_ready():
             return {"error": "Failed to initialize Excel application"}
 
-        workbook = None
         try:
-            workbook = self.excel.Workbooks.Open(excel_file_path)
+            workbook = self._get_workbook(excel_file_path)
             sheet_names = [sheet.Name for sheet in workbook.Sheets]
             return sheet_names
         except Exception as e:
             return {"error": str(e)}
+
+    @staticmethod
+    def _read_range_values(used_range: win32com.client.CDispatch, value2: bool = False) -> tuple:
+        """
+        Reads all values of a range in a single COM call, as a tuple of row tuples.
+        value2: Read Value2, which skips Excel's Date/Currency wrapping and is faster on large
+                ranges, but returns dates as serial-day floats and currency as plain floats.
+        """
+        raw = used_range.Value2 if value2 else used_range.Value
+        if raw is None:
+            return ()
+        if not isinstance(raw, tuple):
+            # A single-cell range comes back as a bare value
+            return ((raw,),)
+        return raw
+
+    @staticmethod
+    def _cell_to_str(cell_value) -> str:
+        """Converts a cell value to its CSV/preview text."""
+        if cell_value is None:
+            return ""
+        if isinstance(cell_value, str):
+            return cell_value.encode('utf-8', errors='ignore').decode('utf-8')
+        return str(cell_value)
+
+    def _process_text_table(self, worksheet: win32com.client.CDispatch, out_stream: TextIO) -> None:
+        """Processes a worksheet as a text table and writes it as CSV to out_stream."""
+        # Whole-sheet fallback export: take the faster Value2 read (dates become serial numbers)
+        rows = self._read_range_values(worksheet.UsedRange, value2=True)
+        if self._needs_csv_quoting(rows):
+            csv_writer = csv.writer(out_stream, quoting=csv.QUOTE_MINIMAL)
+            for row in rows:
+                csv_writer.writerow([self._cell_to_str(cell_value) for cell_value in row])
+        else:
+            # Nothing to quote or escape, so rows can be joined directly (same output as csv.writer)
+            cell_to_str = self._cell_to_str
+            out_stream.writelines(",".join([cell_to_str(cell_value) for cell_value in row]) + "\r\n" for row in rows)
+
+    @staticmethod
+    def _needs_csv_quoting(rows: tuple) -> bool:
+        """True if csv.writer would quote any field, i.e. the direct-join fast path can't be used."""
+        for row in rows:
+            if len(row) == 1 and (row[0] is None or row[0] == ""):
+                return True  # csv.writer writes a lone empty field as "" so the row isn't blank
+            for cell_value in row:
+                if isinstance(cell_value, str) and ('"' in cell_value or ',' in cell_value or '\n' in cell_value or '\r' in cell_value):
+                    return True
+        return False
+
+    def _export_sheet_as_csv(self, worksheet: win32com.client.CDispatch, output_path: str) -> bool:
+        """Saves a worksheet as CSV using Excel's own writer. Returns False if the export failed."""
+        temp_workbook = None
+        try:
+            # Copy() with no target puts the sheet in a new single-sheet workbook, which becomes active
+            worksheet.Copy()
+            temp_workbook = self.excel.ActiveWorkbook
+            if temp_workbook.FullName == worksheet.Parent.FullName:
+                temp_workbook = None  # Copy didn't create a workbook; never close the source
+                return False
+            temp_workbook.SaveAs(os.path.abspath(output_path), FileFormat=XL_CSV_UTF8)
+            return True
+        except Exception as e:
+            print(f"Native CSV export failed for {output_path}: {e}")
+            return False
         finally:
-            if workbook:
-                workbook.Close(SaveChanges=False)
-
-    def _process_text_table(self, worksheet: win32com.client.CDispatch) -> str:
-        """Processes a worksheet as a text table and returns CSV data."""
-        used_range = worksheet.UsedRange
-        output = io.StringIO()
-        csv_writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL)  
-        for row in range(1, used_range.Rows.Count + 1):
-            row_data = []
-            for col in range(1, used_range.Columns.Count + 1):
-                cell_value = used_range.Cells(row, col).Value
-                if cell_value is None:
-                    row_data.append("")
-                elif isinstance(cell_value, str):
-                    row_data.append(cell_value.encode('utf-8', errors='ignore').decode('utf-8'))
-                else:
-                    row_data.append(str(cell_value)) 
-            csv_writer.writerow(row_data)
-        return output.getvalue()
+            if temp_workbook is not None:
+                self._close_workbook(temp_workbook)
 
     def _save_sheet_as_image(self, worksheet: win32com.client.CDispatch, output_path: str) -> bool:
         """Saves a worksheet as an image."""
         try:
             used_range = worksheet.UsedRange
             used_range.Copy()
-            time.sleep(0.5)  # Small delay to ensure clipboard is ready
+            # Poll until the clipboard is populated rather than sleeping a fixed amount
+            deadline = time.monotonic() + CLIPBOARD_TIMEOUT
             image = ImageGrab.grabclipboard()
+            while image is None and time.monotonic() < deadline:
+                pythoncom.PumpWaitingMessages()  # Clipboard rendering is driven by window messages
+                time.sleep(CLIPBOARD_POLL_INTERVAL)
+                image = ImageGrab.grabclipboard()
             if image:
                 image.save(output_path, "PNG")
                 return True
@@ -116,6 +298,7 @@ class ExcelFileHandler:
             print(f"Error saving image: {e}")
             return False
 
+    @_on_com_thread
     def process_sheets(self, excel_file_path: str, output_folder: str, sheet_types: Dict[str, str]) -> Dict[str, Dict[str, str]]:
         """
         Processes specified sheets in an Excel file and converts them to different output formats.
@@ -151,67 +334,70 @@ class ExcelFileHandler:
         if not self._ensure_excel_ready():
             return {"error": "Failed to initialize Excel application"}
 
-        workbook = None
         result: Dict[str, Dict[str, str]] = {}
 
         try:
-            workbook = self.excel.Workbooks.Open(excel_file_path)
-            sheet_names = [sheet.Name for sheet in workbook.Sheets]
+            workbook = self._get_workbook(excel_file_path)
+            types_lower = {name: sheet_type.lower() for name, sheet_type in sheet_types.items()}
 
-            for sheet_name, sheet_type in sheet_types.items():
-                if sheet_name not in sheet_names:
-                    result[sheet_name] = {
-                        "status": "error",
-                        "message": f"Sheet '{sheet_name}' not found in the Excel file."
-                    }
-                    continue
-
-                try:
-                    worksheet = workbook.Sheets(sheet_name)
+            with self._batch_mode():
+                # Walk the workbook's sheets once instead of looking each one up by name
+                for worksheet in workbook.Sheets:
+                    sheet_name = worksheet.Name
+                    sheet_type = types_lower.get(sheet_name)
+                    if sheet_type is None:
+                        continue
 
-                    if sheet_type.lower() == 'table':
-                        csv_data = self._process_text_table(worksheet)
-                        output_path = os.path.join(output_folder, f"{sheet_name}.csv")
-                        with open(output_path, 'w', newline='', encoding='utf-8') as csv_file:
-                            csv_file.write(csv_data)
-                        result[sheet_name] = {
-                            "status": "success",
-                            "type": "table",
-                            "output_path": output_path
-                        }
-                    elif sheet_type.lower() == 'ui':
-                        output_path = os.path.join(output_folder, f"{sheet_name}.png")
-                        success = self._save_sheet_as_image(worksheet, output_path)
-                        if success:
+                    try:
+                        if sheet_type == 'table':
+                            output_path = os.path.join(output_folder, f"{sheet_name}.csv")
+                            if not self._export_sheet_as_csv(worksheet, output_path):
+                                # Fall back to writing the CSV from Python, streamed row by row
+                                with open(output_path, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as csv_file:
+                                    self._process_text_table(worksheet, csv_file)
                             result[sheet_name] = {
                                 "status": "success",
-                                "type": "ui",
+                                "type": "table",
                                 "output_path": output_path
                             }
+                        elif sheet_type == 'ui':
+                            output_path = os.path.join(output_folder, f"{sheet_name}.png")
+                            success = self._save_sheet_as_image(worksheet, output_path)
+                            if success:
+                                result[sheet_name] = {
+                                    "status": "success",
+                                    "type": "ui",
+                                    "output_path": output_path
+                                }
+                            else:
+                                result[sheet_name] = {
+                                    "status": "error",
+                                    "message": "Failed to save sheet as image"
+                                }
                         else:
                             result[sheet_name] = {
                                 "status": "error",
-                                "message": "Failed to save sheet as image"
+                                "message": f"Unknown sheet type '{sheet_types[sheet_name]}'. Use 'ui' or 'table'."
                             }
-                    else:
+                    except Exception as e:
                         result[sheet_name] = {
                             "status": "error",
-                            "message": f"Unknown sheet type '{sheet_type}'. Use 'ui' or 'table'."
+                            "message": str(e)
                         }
-                except Exception as e:
+
+            for sheet_name in sheet_types:
+                if sheet_name not in result:
                     result[sheet_name] = {
                         "status": "error",
-                        "message": str(e)
+                        "message": f"Sheet '{sheet_name}' not found in the Excel file."
                     }
 
         except Exception as e:
             return {"error": str(e)}
-        finally:
-            if workbook:
-                workbook.Close(SaveChanges=False)
 
         return result
 
+    @_on_com_thread
     def get_sheet_preview_data(self, excel_file_path: str, sheet_name: str, max_rows: int = 100) -> Dict:
         """Gets preview data from a specific sheet in an Excel file.
         
@@ -229,58 +415,37 @@ class ExcelFileHandler:
         if not self._ensure_excel_ready():
             return {"error": "Failed to initialize Excel application"}
 
-        workbook = None
-        
         try:
-            workbook = self.excel.Workbooks.Open(excel_file_path)
+            workbook = self._get_workbook(excel_file_path)
             
             # Check if sheet exists
             sheet_names = [sheet.Name for sheet in workbook.Sheets]
             if sheet_name not in sheet_names:
                 return {"error": f"Sheet '{sheet_name}' not found in file. Available sheets: {', '.join(sheet_names)}"}
             
-            worksheet = workbook.Sheets(sheet_name)
-            used_range = worksheet.UsedRange
+            with self._batch_mode():
+                worksheet = workbook.Sheets(sheet_name)
+                used_range = worksheet.UsedRange
             
-            if not used_range:
-                return {"headers": [], "data": []}
+                if not used_range:
+                    return {"headers": [], "data": []}
             
-            # Get the actual row and column count
-            rows_count = used_range.Rows.Count
-            cols_count = used_range.Columns.Count
+                # Fetch the whole range in one COM call instead of one call per cell
+                rows = self._read_range_values(used_range)
+                if not rows:
+                    return {"headers": [], "data": []}
             
-            # Limit rows for preview
-            preview_rows = min(rows_count, max_rows)
+                # Extract headers (first row)
+                headers = [
+                    f"Column {col}" if cell_value is None else str(cell_value)
+                    for col, cell_value in enumerate(rows[0], start=1)
+                ]
             
-            # Extract headers (first row)
-            headers = []
-            for col in range(1, cols_count + 1):
-                cell_value = used_range.Cells(1, col).Value
-                if cell_value is None:
-                    headers.append(f"Column {col}")
-                else:
-                    headers.append(str(cell_value))
-            
-            # Extract data rows (skip header row if we have more than 1 row)
-            data = []
-            start_row = 2 if rows_count > 1 else 1
-            
-            for row in range(start_row, min(preview_rows + 1, rows_count + 1)):
-                row_data = []
-                for col in range(1, cols_count + 1):
-                    cell_value = used_range.Cells(row, col).Value
-                    if cell_value is None:
-                        row_data.append("")
-                    elif isinstance(cell_value, str):
-                        row_data.append(cell_value.encode('utf-8', errors='ignore').decode('utf-8'))
-                    else:
-                        row_data.append(str(cell_value))
-                data.append(row_data)
+                # Extract data rows (skip header row if we have more than 1 row), limited for preview
+                data_rows = rows[1:max_rows] if len(rows) > 1 else rows[:1]
+                data = [[self._cell_to_str(cell_value) for cell_value in row] for row in data_rows]
                 
-            return {"headers": headers, "data": data}
+                return {"headers": headers, "data": data}
             
         except Exception as e:
-            return {"error": f"Error reading sheet '{sheet_name}': {str(e)}"}
-        finally:
-            if workbook:
-                workbook.Close(SaveChanges=False)
\ No newline at end of file
+            return {"error": f"Error reading sheet '{sheet_name}': {str(e)}"}
\ No newline at end of file
@@ -1,17 +1,42 @@
 import os
+import asyncio
+import bisect
 import datetime
 import json
+import time
+from functools import cached_property
+from pathlib import Path
 from fastapi import File
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+from models import ProjectInfo
 from .WebSocketManager import project_socket_manager
 from .Context import Context # Import the new Context class
 
+# Contents smaller than this are written inline; larger ones go to a worker thread
+# through a bigger buffer so the event loop isn't blocked on disk I/O.
+_INLINE_WRITE_LIMIT = 4 * 1024
+_WRITE_BUFFER_SIZE = 128 * 1024
+
+_EXTENSION_MAP = {
+    '.txt': 'text', '.md': 'text', '.csv': 'text',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.gif': 'image', '.bmp': 'image', '.svg': 'image',
+    '.xlsx': 'excel', '.xls': 'excel',
+    '.pdf': 'pdf',
+    '.json': 'json',
+    '.html': 'html', '.htm': 'html',
+}
+
 class Project:
     """
     Class representing a document generation project,
     containing metadata and directory structures.
     """
 
+    # Debounced scans within this window (seconds) reuse the previous result.
+    SCAN_TTL = 1.0
+    # save_metadata() calls within this window (seconds) are coalesced into one write.
+    SAVE_DELAY = 0.05
+
     def __init__(self, name: str, base_dir: str = None):
         """
         Initialize a new project.
@@ -41,17 +66,69 @@ class Project:
         }
         self.processing_history = []
 
+        # Scan debounce and metadata dirty tracking. The scan replaces self.files after awaiting
+        # its directory listings, so in-place file edits take the same lock to not be overwritten.
+        self._scan_lock = asyncio.Lock()
+        self._last_scan_ts = 0.0
+        self._metadata_dirty = True
+        self._save_task: Optional[asyncio.Task] = None
+
+        # to_dict() result tagged with the _version it was built at; bumped by mark_modified
+        self._version = 0
+        self._dict_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # ProjectInfo view and its JSON-ready dump, rebuilt after each mutation
+        self._info_cache: Optional[ProjectInfo] = None
+        self._info_payload_cache: Optional[Dict[str, Any]] = None
+        # Processed image paths, derived from self.files["processed"]
+        self._image_dirs_cache: Optional[Tuple[str, ...]] = None
+        # name -> file record per file type, kept alongside self.files for O(1) lookups
+        self._files_by_name: Dict[str, Dict[str, Dict[str, Any]]] = {"input": {}, "processed": {}, "output": {}}
+        self._file_paths: Dict[str, set] = {"input": set(), "processed": set(), "output": set()}
+
         # Initialize Context
         self.context = Context(self)
 
+    def mark_modified(self) -> None:
+        """Bumps modified_date and flags the metadata as needing a save."""
+        self.modified_date = datetime.datetime.now()
+        self._metadata_dirty = True
+        self._version += 1
+        self._info_cache = None
+        self._info_payload_cache = None
+        self._image_dirs_cache = None
+
+    def get_info(self) -> ProjectInfo:
+        """Returns the ProjectInfo model for this project, cached until the next mutation."""
+        if self._info_cache is None:
+            self._info_cache = ProjectInfo(**self.to_dict())
+        return self._info_cache
+
+    def get_info_payload(self) -> Dict[str, Any]:
+        """Returns the JSON-ready dump of get_info(), cached until the next mutation. Treat as read-only."""
+        if self._info_payload_cache is None:
+            self._info_payload_cache = self.get_info().model_dump(mode="json")
+        return self._info_payload_cache
+
     async def _broadcast_update(self):
         """Broadcasts the current project state."""
-        if self.id:
+        if self.id and project_socket_manager.has_subscribers(self.id):
             await project_socket_manager.broadcast(self.id, self.to_dict())
 
+    async def _broadcast_patch(self, op: str, **fields: Any):
+        """Broadcasts a single change to the project state instead of the full snapshot."""
+        if self.id and project_socket_manager.has_subscribers(self.id):
+            await project_socket_manager.broadcast_patch(
+                self.id, {"op": op, "modified_date": self.modified_date.isoformat(), **fields}
+            )
+
     def to_dict(self) -> Dict[str, Any]:
-        """Converts project object to a dictionary for broadcasting and saving."""
-        return {
+        """
+        Converts project object to a dictionary for broadcasting and saving.
+        The result is cached until the next mark_modified(); treat it as read-only.
+        """
+        if self._dict_cache is not None and self._dict_cache[0] == self._version:
+            return self._dict_cache[1]
+        data = {
             "name": self.name,
             "id": self.id,
             "created_date": self.created_date.isoformat(),
@@ -80,6 +157,18 @@ class Project:
             # "generated_diagrams_summary": list(self.context.generated_diagram.keys()),
             # "has_prototype_code": bool(self.context.prototype_code)
         }
+        self._dict_cache = (self._version, data)
+        return data
+
+    # Resolved once per Project; base_dir never changes after load, so serve
+    # endpoints can skip Path.resolve() on every request.
+    @cached_property
+    def resolved_processed_dir(self) -> Path:
+        return Path(self.processed_dir).resolve()
+
+    @cached_property
+    def resolved_output_dir(self) -> Path:
+        return Path(self.output_dir).resolve()
 
     def _generate_id(self) -> str:
         """Generate a unique ID based on timestamp."""
@@ -96,23 +185,17 @@ class Project:
         Returns:
             File type string based on extension
         """
-        _, extension = os.path.splitext(file_name)
-        extension = extension.lower()
-        
-        if extension in ['.txt', '.md', '.csv']:
-            return 'text'
-        elif extension in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg']:
-            return 'image'
-        elif extension in ['.xlsx', '.xls']:
-            return 'excel'
-        elif extension in ['.pdf']:
-            return 'pdf'
-        elif extension in ['.json']:
-            return 'json'
-        elif extension in ['.html', '.htm']:
-            return 'html'
-        else:
-            return 'file'
+        return _EXTENSION_MAP.get(os.path.splitext(file_name)[1].lower(), 'file')
+
+    def _rebuild_file_index(self) -> None:
+        self._files_by_name = {
+            type_key: {f["name"]: f for f in files} for type_key, files in self.files.items()
+        }
+        self._file_paths = {type_key: {f["path"] for f in files} for type_key, files in self.files.items()}
+
+    def get_file(self, file_type: str, file_name: str) -> Optional[Dict[str, Any]]:
+        """Returns the tracked file record with this name, or None."""
+        return self._files_by_name.get(file_type, {}).get(file_name)
 
     def get_preview_html_dir(self)->str:
         # Check output first, then processed for HTML files
@@ -122,51 +205,97 @@ class Project:
                     return file_info["path"]
         return None
 
-    def get_image_dirs(self) -> List[str]:
-        """Get the list of paths to image files in the processed directory."""
-        return [file["path"] for file in self.files["processed"] if file["path"].lower().endswith(('.png', '.jpg', '.jpeg'))]
+    def get_image_dirs(self) -> Tuple[str, ...]:
+        """Get the paths to image files in the processed directory, cached until the file lists change."""
+        if self._image_dirs_cache is None:
+            self._image_dirs_cache = tuple(file["path"] for file in self.files["processed"] if file["path"].lower().endswith(('.png', '.jpg', '.jpeg')))
+        return self._image_dirs_cache
 
     def get_csv_dirs(self) -> List[str]:
         """Get the list of paths to CSV files in the processed directory."""
         return [file["path"] for file in self.files["processed"] if file["path"].lower().endswith('.csv')]
 
-    async def scan_and_update_files(self) -> None:
-        self.files = {
-            "input": [],
-            "processed": [],
-            "output": []
-        }
-        dir_map = {
-            self.input_dir: "input",
-            self.processed_dir: "processed",
-            self.output_dir: "output"
-        }
+    async def scan_and_update_files(self, debounce: bool = False) -> None:
+        """
+        Rescan the project directories and rebuild the file lists.
+        debounce: If True, skip the scan when one completed less than SCAN_TTL seconds ago.
+        """
+        async with self._scan_lock:
+            await self._scan_and_update_files_locked(debounce)
 
-        for directory, type_key in dir_map.items():
-            if os.path.exists(directory):
-                for file_name in os.listdir(directory):
-                    file_path = os.path.join(directory, file_name)
-                    if os.path.isfile(file_path):
-                        if file_name.lower().endswith('.geometry.json'):
-                            continue           
-                        if not any(f['path'] == file_path for f in self.files[type_key]):
-                            self.files[type_key].append({
-                                "path": file_path,
-                                "name": file_name,
-                                "type": self._get_file_type_from_extension(file_name),
-                                "added_date": datetime.datetime.fromtimestamp(os.path.getctime(file_path)).isoformat(),
-                                "modified_date": datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
-                                "size": os.path.getsize(file_path)
-                            })
-            # Sort files by name for consistent display
-            self.files[type_key] = sorted(self.files[type_key], key=lambda x: x['name'])
+    async def _scan_and_update_files_locked(self, debounce: bool = False) -> None:
+        # Caller holds _scan_lock
+        if debounce and time.monotonic() - self._last_scan_ts < self.SCAN_TTL:
+            return
+        await self._scan_files()
+        self._last_scan_ts = time.monotonic()
 
-        self.modified_date = datetime.datetime.now()
+    async def _scan_files(self) -> None:
+        dir_map = {
+            "input": self.input_dir,
+            "processed": self.processed_dir,
+            "output": self.output_dir
+        }
+        # Each directory is listed in a worker thread so slow (e.g. network) mounts overlap
+        # instead of blocking the event loop one stat at a time.
+        results = await asyncio.gather(*(asyncio.to_thread(self._scan_dir, d) for d in dir_map.values()))
+        files = dict(zip(dir_map.keys(), results))
+        if files == self.files:
+            return  # Nothing changed on disk; keep the metadata clean and the caches warm
+        self.files = files
+
+        self._rebuild_file_index()
+        self.mark_modified()
         self.context.update_from_project() # Update context after file scan
         await self._broadcast_update()
         print(f"Scanned and updated files for project {self.name}. Total files: {sum(len(v) for v in self.files.values())}")
         print(self.files)
 
+    def _scan_dir(self, directory: str) -> List[Dict[str, Any]]:
+        """Returns the file records of a directory, sorted by name. Runs in a worker thread."""
+        records = []
+        if os.path.exists(directory):
+            # scandir entries carry the file type from the directory read and cache
+            # their stat result, so each file costs at most one stat call.
+            # Names are unique within a listing, so no duplicate check is needed.
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name.lower().endswith('.geometry.json'):
+                        continue
+                    records.append(self._make_file_record(entry.path, entry.name, entry.stat()))
+        # Sort files by name for consistent display
+        records.sort(key=lambda x: x['name'])
+        return records
+
+    def _make_file_record(self, file_path: str, file_name: str, stat_result: os.stat_result) -> Dict[str, Any]:
+        return {
+            "path": file_path,
+            "name": file_name,
+            "type": self._get_file_type_from_extension(file_name),
+            "added_date": datetime.datetime.fromtimestamp(stat_result.st_ctime).isoformat(),
+            "modified_date": datetime.datetime.fromtimestamp(stat_result.st_mtime).isoformat(),
+            "size": stat_result.st_size
+        }
+
+    def _insert_file_record(self, file_type: str, record: Dict[str, Any]) -> None:
+        """Inserts a record into self.files[file_type], keeping the list sorted by name."""
+        files = self.files[file_type]
+        index = bisect.bisect_right([f["name"] for f in files], record["name"])
+        files.insert(index, record)
+        self._files_by_name[file_type][record["name"]] = record
+        self._file_paths[file_type].add(record["path"])
+
+    def _remove_file_record(self, file_type: str, record: Dict[str, Any]) -> None:
+        self.files[file_type].remove(record)
+        self._files_by_name[file_type].pop(record["name"], None)
+        self._file_paths[file_type].discard(record["path"])
+
+    async def _on_files_changed(self, file_type: str, op: str, **fields: Any) -> None:
+        """Refreshes derived state and sends clients a patch after an in-place change to self.files."""
+        self.mark_modified()
+        if file_type == "processed":
+            self.context.update_from_project() # Context only draws on processed files
+        await self._broadcast_patch(op, file_type=file_type, **fields)
 
     def create_directory_structure(self) -> bool:
         """Create the project directory structure."""
@@ -214,8 +343,10 @@ class Project:
             new_file_path = os.path.join(dest_dir, current_file_name)
             counter += 1
         try:
-            with open(new_file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            if len(content) < _INLINE_WRITE_LIMIT:
+                self._write_file(new_file_path, content)
+            else:
+                await asyncio.to_thread(self._write_file, new_file_path, content, _WRITE_BUFFER_SIZE)
 
             await self.add_file(new_file_path, file_type, current_file_name)
             print(f"Created file: {new_file_path}")
@@ -225,6 +356,11 @@ class Project:
             print(f"Error creating file {current_file_name}: {e}")
             return None
 
+    @staticmethod
+    def _write_file(file_path: str, content: str, buffering: int = -1) -> None:
+        with open(file_path, 'w', encoding='utf-8', buffering=buffering) as f:
+            f.write(content)
+
     async def add_file(self, file_path: str, file_type: str, file_name: Optional[str] = None) -> bool:
         """
         Adds a file record to the project metadata.
@@ -240,22 +376,30 @@ class Project:
         if not file_name:
             file_name = os.path.basename(file_path)
 
-        # Verify the file actually exists
-        if not os.path.exists(file_path):
-            print(f"File {file_path} does not exist on disk. Cannot add to project.")
-            return False        # Check if file is already tracked
-        if any(f['path'] == file_path for f in self.files[file_type]):
-            print(f"File {file_path} already tracked in {file_type} directory.")
-            return True  # Return True since it's already added
-
-        try:
-            # Use scan_and_update_files to refresh file list instead of direct manipulation
-            await self.scan_and_update_files()
-            self.modified_date = datetime.datetime.now()
-            return True
-        except Exception as e:
-            print(f"Error adding file {file_name} to {file_type}: {e}")
-            return False
+        async with self._scan_lock:
+            # Check if file is already tracked
+            if file_path in self._file_paths[file_type]:
+                print(f"File {file_path} already tracked in {file_type} directory.")
+                return True  # Return True since it's already added
+
+            try:
+                # Stat once to both verify the file exists and fill in its record
+                stat_result = os.stat(file_path)
+            except OSError:
+                print(f"File {file_path} does not exist on disk. Cannot add to project.")
+                return False
+
+            try:
+                existing = self.get_file(file_type, file_name)
+                if existing is not None:
+                    self._remove_file_record(file_type, existing)
+                record = self._make_file_record(file_path, file_name, stat_result)
+                self._insert_file_record(file_type, record)
+                await self._on_files_changed(file_type, "add_file", file=record)
+                return True
+            except Exception as e:
+                print(f"Error adding file {file_name} to {file_type}: {e}")
+                return False
         
     
     async def delete_file(self, file_name: str, file_type: str) -> bool:
@@ -268,20 +412,22 @@ class Project:
         if file_type not in self.files:
             print(f"Invalid file type: {file_type}")
             return False        
-        for file_info in self.files[file_type]:
-            if file_info["name"] == file_name:
-                try:
-                    os.remove(file_info["path"])
-                    # Use scan_and_update_files to refresh file list instead of direct manipulation
-                    await self.scan_and_update_files()
-                    self.modified_date = datetime.datetime.now()
-                    return True
-                except Exception as e:
-                    print(f"Error deleting file {file_name}: {e}")
-                    return False
-
-        print(f"File '{file_name}' not found in type '{file_type}' for deletion.")
-        return False    
+        async with self._scan_lock:
+            file_info = self.get_file(file_type, file_name)
+            if file_info is None:
+                print(f"File '{file_name}' not found in type '{file_type}' for deletion.")
+                return False
+            try:
+                os.remove(file_info["path"])
+            except FileNotFoundError:
+                pass  # Already gone from disk (e.g. removed by the caller); just drop the record
+            except Exception as e:
+                print(f"Error deleting file {file_name}: {e}")
+                return False
+            self._remove_file_record(file_type, file_info)
+            await self._on_files_changed(file_type, "remove_file", name=file_name)
+            return True
+
     async def rename_file(self, file_name: str, new_name: str, file_type: str) -> bool:
         if file_type not in self.files:
             print(f"Invalid file type: {file_type}")
@@ -297,42 +443,76 @@ class Project:
             print(f"Unknown file type for destination directory: {file_type}")
             return False
 
-        for file_info in self.files[file_type]:
-            if file_info["name"] == file_name:
-                old_path = file_info["path"]
-                if not os.path.exists(old_path):
-                    print(f"Error: Original file path does not exist: {old_path}")
-                    # Try to rescan and then retry, or just fail
-                    await self.scan_and_update_files() # Rescan to fix potential inconsistencies
-                    # Re-check after scan
-                    if not any(f["name"] == file_name and f["path"] == old_path for f in self.files[file_type]):
-                         print(f"File {file_name} still not found after rescan. Cannot rename.")
-                         return False
-
-                new_path = os.path.join(dest_dir, new_name)
-
-                if os.path.exists(new_path):
-                    print(f"Error: New file name '{new_name}' already exists at '{new_path}'.")
-                    return False
-                try:
-                    os.rename(old_path, new_path)
-                    # Use scan_and_update_files to refresh file list instead of direct manipulation
-                    await self.scan_and_update_files()
-                    self.modified_date = datetime.datetime.now()
-                    return True
-                except Exception as e:
-                    print(f"Error renaming file {file_name} to {new_name}: {e}")
-                    return False
-
-        print(f"File '{file_name}' not found in type '{file_type}' for renaming.")
-        return False
+        async with self._scan_lock:
+            file_info = self.get_file(file_type, file_name)
+            if file_info is None:
+                print(f"File '{file_name}' not found in type '{file_type}' for renaming.")
+                return False
+
+            old_path = file_info["path"]
+            if not os.path.exists(old_path):
+                print(f"Error: Original file path does not exist: {old_path}")
+                # Try to rescan and then retry, or just fail
+                await self._scan_and_update_files_locked() # Rescan to fix potential inconsistencies
+                # Re-check after scan
+                rescanned = self.get_file(file_type, file_name)
+                if rescanned is None or rescanned["path"] != old_path:
+                     print(f"File {file_name} still not found after rescan. Cannot rename.")
+                     return False
+                file_info = rescanned
+
+            new_path = os.path.join(dest_dir, new_name)
+
+            if os.path.exists(new_path):
+                print(f"Error: New file name '{new_name}' already exists at '{new_path}'.")
+                return False
+            try:
+                os.rename(old_path, new_path)
+                # Re-insert so the list stays sorted under the new name
+                self._remove_file_record(file_type, file_info)
+                file_info.update(path=new_path, name=new_name, type=self._get_file_type_from_extension(new_name))
+                self._insert_file_record(file_type, file_info)
+                await self._on_files_changed(file_type, "rename_file", old_name=file_name, file=file_info)
+                return True
+            except Exception as e:
+                print(f"Error renaming file {file_name} to {new_name}: {e}")
+                return False
 
     async def save_metadata(self) -> bool:
-        """Save project metadata to a JSON file in the project directory."""
+        """
+        Schedule a save of the project metadata. Calls arriving within SAVE_DELAY seconds
+        share a single write; use flush_metadata() when the file must be on disk now.
+        """
+        if not self._metadata_dirty:
+            return True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save())
+        return True
+
+    async def flush_metadata(self) -> bool:
+        """Write pending metadata changes immediately, cancelling any scheduled save."""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+        self._save_task = None
+        return self._write_metadata()
+
+    async def _delayed_save(self) -> None:
+        await asyncio.sleep(self.SAVE_DELAY)
+        self._write_metadata()
+
+    def _write_metadata(self) -> bool:
+        """Save project metadata to a JSON file in the project directory. No-op if nothing changed since the last save."""
+        if not self._metadata_dirty:
+            return True
         try:
             meta_path = os.path.join(self.project_dir, "project_metadata.json")
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                json.dump(self.to_dict(), f, indent=2)
+            payload = json.dumps(self.to_dict(), indent=2).encode('utf-8')
+            # Write to a temp file and swap it in, so a crash mid-write never leaves truncated metadata
+            tmp_path = meta_path + ".tmp"
+            with open(tmp_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+                f.write(payload)
+            os.replace(tmp_path, meta_path)
+            self._metadata_dirty = False
             # No broadcast here, as save_metadata is often called after an action that already broadcasted.
             # If called standalone, then a broadcast might be desired.
             # await self._broadcast_update() # Consider if needed here or if callers handle it.
@@ -356,6 +536,9 @@ class Project:
             project.input_dir = os.path.join(project.project_dir, "input")
             project.processed_dir = os.path.join(project.project_dir, "processed")
             project.output_dir = os.path.join(project.project_dir, "output")
+            # Drop resolved paths cached against the constructor's directories
+            for attr in ("resolved_processed_dir", "resolved_output_dir"):
+                project.__dict__.pop(attr, None)
 
             project.created_date = datetime.datetime.fromisoformat(metadata["created_date"])
             project.modified_date = datetime.datetime.fromisoformat(metadata["modified_date"])
@@ -363,6 +546,8 @@ class Project:
             project.tags = metadata.get("tags", [])
 
             project.files = metadata.get("files", {"input": [], "processed": [], "output": []})
+            project._image_dirs_cache = None
+            project._rebuild_file_index()
             project.processing_history = metadata.get("processing_history", [])
 
             # Initialize context (it will call update_from_project itself)
@@ -382,6 +567,7 @@ class Project:
             # These are now correctly set before Context is fully initialized.
             # A final update_from_project might be redundant but ensures consistency if loading logic changes.
             project.context.update_from_project()
+            project._dict_cache = None # Fields were assigned directly, without mark_modified
 
             return project
         except Exception as e:
@@ -400,8 +586,10 @@ class Project:
             "details": details or {}
         }
         self.processing_history.append(record)
-        self.modified_date = datetime.datetime.now()
-        await self._broadcast_update()
+        self.mark_modified()
+        # Processing writes files outside add_file, so the next scan must not be debounced
+        self._last_scan_ts = 0.0
+        await self._broadcast_patch("add_processing_record", record=record)
 
     def __str__(self) -> str:
         return f"Project: {self.name} (ID: {self.id}, Created: {self.created_date.strftime('%Y-%m-%d')})"
@@ -1,30 +1,108 @@
+import os
+import sys
 import json
 from pathlib import Path
-from typing import List, Dict, Any
-from config import settings 
+from typing import List, Dict, Any, Tuple
+from config import settings
+
+# The registry is stored as JSON Lines (one project dict per line) so that adding a project
+# is a single append. Files written by older versions hold a single JSON array; they are
+# still read, and are converted to JSON Lines on the next save.
+
+# Last parsed registry, keyed by the file's (st_mtime_ns, st_size) when it was read or written
+_registry_cache: Dict[str, Any] = {"stat": None, "value": []}
+
+def _registry_stat_key() -> Tuple[int, int]:
+    st = settings.PROJECTS_REGISTRY_FILE.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+def _copy_entries(projects_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Callers modify the entries they get back, so the cache never hands out its own dicts
+    return [dict(p) for p in projects_list]
+
+def _encode_entry(project: Dict[str, Any]) -> bytes:
+    return json.dumps(project).encode('utf-8') + b"\n"
+
+def _parse_registry(content: bytes) -> List[Dict[str, Any]]:
+    if content.lstrip()[:1] == b"[":
+        return json.loads(content)  # Legacy single-array registry
+    projects = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            # Most likely an append cut short by a crash; the other entries are still valid
+            print(f"Skipping unreadable projects registry line: {e}")
+            continue
+        if not isinstance(entry, dict):
+            print(f"Skipping projects registry line that is not a project entry: {line[:80]!r}")
+            continue
+        # Lines are decoded separately, so each would get its own copies of the key strings
+        projects.append({sys.intern(key): value for key, value in entry.items()})
+    return projects
 
 def save_projects_registry(projects_list: List[Dict[str, Any]]):
     """Save projects list to registry file."""
+    registry_file = settings.PROJECTS_REGISTRY_FILE
+    # Write a temp file and swap it in, so a crash mid-write never leaves a truncated registry
+    tmp_file = registry_file.with_suffix(registry_file.suffix + ".tmp")
     try:
-        with open(settings.PROJECTS_REGISTRY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(projects_list, f, indent=4)
+        with open(tmp_file, 'wb') as f:
+            # Encode everything first and write once
+            f.write(b"".join(_encode_entry(p) for p in projects_list))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, registry_file)
+        _registry_cache["stat"], _registry_cache["value"] = _registry_stat_key(), _copy_entries(projects_list)
     except Exception as e:
         print(f"Error writing projects registry: {e}")
-        
+
+
+def append_project(project: Dict[str, Any]):
+    """Add one project to the registry file without reading or rewriting the existing entries."""
+    registry_file = settings.PROJECTS_REGISTRY_FILE
+    try:
+        previous_stat = None
+        needs_newline = False
+        if registry_file.exists():
+            with open(registry_file, 'rb') as f:
+                is_legacy_array = f.read(1) == b"["
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b"\n"  # Don't glue onto a line left unfinished by a crash
+            if is_legacy_array:
+                # Rewrite an old array-format file once as JSON Lines
+                save_projects_registry(load_projects_registry() + [project])
+                return
+            previous_stat = _registry_stat_key()
+        with open(registry_file, 'ab') as f:
+            f.write((b"\n" if needs_newline else b"") + _encode_entry(project))
+        if previous_stat is not None and previous_stat == _registry_cache["stat"]:
+            _registry_cache["value"].append(dict(project))
+            _registry_cache["stat"] = _registry_stat_key()
+        else:
+            _registry_cache["stat"] = None  # Cache didn't match the file; re-read on next load
+    except Exception as e:
+        print(f"Error appending to projects registry: {e}")
+
 
 def load_projects_registry() -> List[Dict[str, Any]]:
-    """Load projects list from registry file."""
+    """Load projects list from registry file. Re-parses only when the file has changed since the last read."""
     if not settings.PROJECTS_REGISTRY_FILE.exists():
         return []
     try:
-        with open(settings.PROJECTS_REGISTRY_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            if not content: 
-                return []
-            return json.loads(content)
+        stat_key = _registry_stat_key()
+        if stat_key != _registry_cache["stat"]:
+            # json.loads takes the raw bytes directly, skipping the text-mode decode layer
+            with open(settings.PROJECTS_REGISTRY_FILE, 'rb') as f:
+                content = f.read()
+            _registry_cache["stat"], _registry_cache["value"] = stat_key, _parse_registry(content)
+        return _copy_entries(_registry_cache["value"])
     except json.JSONDecodeError as e:
         print(f"Error decoding projects registry JSON: {e}")
-        
+
         return []
     except Exception as e:
         print(f"Error reading projects registry: {e}")
@@ -1,43 +1,135 @@
-from typing import List, Dict, Any
+import asyncio
+import functools
+import json
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Any, List, Optional, Set
 from fastapi import WebSocket
 
+# Lazy %-formatting: connection events are only formatted when debug logging is enabled
+logger = logging.getLogger(__name__)
+
+def _encode(message_data: Dict[str, Any]) -> str:
+    # Same encoding as WebSocket.send_json
+    return json.dumps(message_data, separators=(",", ":"), ensure_ascii=False)
+
 class ConnectionManager:
+    # Messages broadcast within this many seconds of each other go out as one frame
+    BATCH_WINDOW = 0.01
+    # A socket with this many frames still unsent has stopped reading and is dropped
+    MAX_PENDING_SENDS = 1024
+
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {} 
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Unfinished sends per socket, oldest first; each waits on the one before so frames stay in order
+        self._pending_sends: Dict[WebSocket, Deque[asyncio.Task]] = {}
+        # Encoded messages waiting for the next flush, per project
+        self._queued: Dict[str, List[str]] = {}
+        self._flush_timers: Dict[str, asyncio.TimerHandle] = {}
 
-    async def connect(self, websocket: WebSocket, project_id: str):
+    async def connect(self, websocket: WebSocket, project_id: str,
+                      initial_message: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
+        """
+        Accepts and registers a socket. initial_message, if given, builds a message (e.g. a full
+        state snapshot) that is sent before any broadcast reaches this socket.
+        """
         await websocket.accept()
-        if project_id not in self.active_connections:
-            self.active_connections[project_id] = []
-        self.active_connections[project_id].append(websocket)
-        print(f"WebSocket connected for project {project_id}. Total: {len(self.active_connections[project_id])}")
+        # Messages queued before this point are already reflected in the initial message, so they
+        # go out now to the existing sockets only. No await from here on: nothing can be queued
+        # between building the initial message and registering the socket.
+        self._flush(project_id)
+        self.active_connections.setdefault(project_id, set()).add(websocket)
+        if initial_message is not None:
+            message_data = initial_message()
+            if message_data is not None:
+                # Goes through the socket's send chain, so later broadcasts are sent after it
+                self._send_in_background(websocket, _encode(message_data), project_id)
+        logger.debug("WebSocket connected for project %s. Total: %d", project_id, len(self.active_connections[project_id]))
 
 
     def disconnect(self, websocket: WebSocket, project_id: str):
-        if project_id in self.active_connections:
-            if websocket in self.active_connections[project_id]:
-                self.active_connections[project_id].remove(websocket)
-                if not self.active_connections[project_id]: 
-                    del self.active_connections[project_id]
-                print(f"WebSocket disconnected for project {project_id}.")
-            
-            if project_id in self.active_connections and not self.active_connections[project_id]:
-                 del self.active_connections[project_id]
+        # Queued frames can't be delivered any more; cancelling them also stops each one
+        # from failing and warning on its own
+        for task in self._pending_sends.pop(websocket, ()):
+            task.cancel()
+        connections = self.active_connections.get(project_id)
+        if connections is not None and websocket in connections:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[project_id]
+            logger.debug("WebSocket disconnected for project %s.", project_id)
 
 
+    def has_subscribers(self, project_id: str) -> bool:
+        """True if any socket is connected for the project; lets callers skip building messages nobody receives."""
+        return bool(self.active_connections.get(project_id))
+
     async def broadcast(self, project_id: str, message_data: Dict[str, Any]):
-        if project_id in self.active_connections:
-            disconnected_sockets = []
-            
-            for connection in list(self.active_connections.get(project_id, [])): 
-                try:
-                    await connection.send_json(message_data)
-                except Exception as e: 
-                    print(f"Error broadcasting to a websocket for project {project_id}: {e}. Marking for disconnection.")
-                    disconnected_sockets.append(connection)
-            
-            for sock in disconnected_sockets:
-                self.disconnect(sock, project_id)
+        if not self.has_subscribers(project_id):
+            return
+        # Encode now, once for all clients, so the frame reflects the state at broadcast time
+        # (messages can reference live project data).
+        encoded = _encode(message_data)
+        queued = self._queued.get(project_id)
+        if queued is None:
+            self._queued[project_id] = [encoded]
+            self._flush_timers[project_id] = asyncio.get_running_loop().call_later(self.BATCH_WINDOW, self._flush, project_id)
+        else:
+            queued.append(encoded)
+
+    def _flush(self, project_id: str):
+        timer = self._flush_timers.pop(project_id, None)
+        if timer is not None:
+            timer.cancel()  # No-op when the timer is what called us
+        messages = self._queued.pop(project_id, None)
+        if not messages or not self.has_subscribers(project_id):
+            return
+        # A burst becomes one frame holding the messages in order; a lone message is sent as is
+        if len(messages) == 1:
+            payload = messages[0]
+        else:
+            payload = '{"type":"batch","messages":[' + ",".join(messages) + "]}"
+        # Fire and forget: a broadcast has no use for backpressure, so nothing waits on any client.
+        # Failed sockets are dropped from the send's done callback. Iterating a snapshot needs no
+        # lock: the set is only mutated by synchronous code on this event loop.
+        for connection in tuple(self.active_connections[project_id]):
+            self._send_in_background(connection, payload, project_id)
+
+    def _send_in_background(self, connection: WebSocket, payload: str, project_id: str):
+        pending = self._pending_sends.setdefault(connection, deque())
+        if len(pending) >= self.MAX_PENDING_SENDS:
+            logger.warning("WebSocket for project %s has %d unsent frames. Disconnecting it.", project_id, len(pending))
+            self.disconnect(connection, project_id)
+            return
+        task = asyncio.ensure_future(self._send_after(pending[-1] if pending else None, connection, payload))
+        pending.append(task)
+        task.add_done_callback(functools.partial(self._on_send_done, connection, project_id))
+
+    @staticmethod
+    async def _send_after(previous: Optional[asyncio.Task], connection: WebSocket, payload: str):
+        if previous is not None and not previous.done():
+            await asyncio.wait((previous,))  # Wait for it without re-raising its error
+        await connection.send_text(payload)
+
+    def _on_send_done(self, connection: WebSocket, project_id: str, task: asyncio.Task):
+        pending = self._pending_sends.get(connection)
+        if pending is not None:
+            if pending and pending[0] is task:
+                pending.popleft()
+            elif task in pending:
+                pending.remove(task)
+            if not pending:
+                del self._pending_sends[connection]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning("Error broadcasting to a websocket for project %s: %s. Marking for disconnection.", project_id, error)
+            self.disconnect(connection, project_id)
+
+    async def broadcast_patch(self, project_id: str, patch: Dict[str, Any]):
+        """Broadcasts an incremental project update; clients apply it to their copy of the project state."""
+        await self.broadcast(project_id, {"type": "project_patch", "id": project_id, **patch})
 
 
 chat_socket_manager = ConnectionManager()
@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from agents.schema.UseCaseDiagramSchema import JSON_USE_CASE_DIAGRAM_SCHEMA_STRING, VALIDATE_SCHEMA_USE_CASE_DIAGRAM
+from agents.schema.UseCaseDiagramSchema import JSON_USE_CASE_DIAGRAM_SCHEMA_STRING, VALIDATE_SCHEMA_USE_CASE_DIAGRAM, USE_CASE_PATTERN
 import json
 
 def test_use_case_schema():
@@ -63,8 +63,7 @@ def test_diagram_type_detection():
     ]
     
     for prompt in test_prompts:
-        prompt_lower = prompt.lower()
-        if "use case" in prompt_lower or "usecase" in prompt_lower:
+        if USE_CASE_PATTERN.search(prompt):
             diagram_type = "Use Case Diagram"
         else:
             diagram_type = "UML Class Diagram"